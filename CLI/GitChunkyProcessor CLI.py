@@ -1,14 +1,64 @@
 import os
 import re
+import mmap
+import atexit
 import subprocess
 import logging
 import json
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+# Optional: batched statx through io_uring for the existence scan on Linux
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# Optional: faster JSON for the processed chunks file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Define custom log levels with colors (terminal-specific)
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
+# Chunk header lines look like "Chunk #3 (120 files, 48.5MB):", followed by
+# one "- path" line per file; both are matched on the raw bytes of the log
+_CHUNK_MARKER = b'Chunk #'
+_CHUNK_RE = re.compile(rb'^[ \t]*Chunk #(\d+) \((\d+) files, (\d+(?:\.\d*)?|\.\d+)MB\):', re.MULTILINE)
+# Start of a header line; one that fails _CHUNK_RE is malformed, other "Chunk #" lines are just text
+_CHUNK_START_RE = re.compile(rb'[ \t]*Chunk #\d+ \(')
+# Anchored on the newline rather than ^ so the regex engine can skip ahead to
+# each line start; a chunk's file lines always follow its header line
+_FILE_RE = re.compile(rb'\n[ \t]*- (\S+)')
+
+# Threads used to check file existence; stat calls release the GIL
+EXISTS_CHECK_WORKERS = 32
+# Below this many files a serial check beats handing batches to the thread pool
+EXISTS_CHECK_PARALLEL_MIN = 256
+# Directory entries read per wanted file before a directory scan gives up
+LISTDIR_ENTRIES_PER_FILE = 64
+# statx requests submitted to io_uring per batch
+URING_BATCH_SIZE = 64
+
+# Threads that prepare upcoming chunks (existence checks, blob writes) while the current one commits
+PREP_WORKERS = min(8, os.cpu_count() or 1)
+# One existence-check pool shared by all prep workers, so the thread count stays
+# bounded however many chunks are prepared at once; threads start on first use
+_exists_pool = ThreadPoolExecutor(max_workers=EXISTS_CHECK_WORKERS)
+
+# Processed chunk numbers loaded by load_processed_chunks, kept for the whole run
+_processed_cache = None
+# Journal file kept open for appends between save_processed_chunk calls
+_journal_handle = None
+
+# Push after every N committed chunks so each push stays chunk-sized; 0 pushes once after all chunks
+PUSH_EVERY_N_CHUNKS = 1
+
 def setup_logging(log_folder, log_file_name):
     """Set up logging configuration with user-friendly formatting and colors"""
     Path(log_folder).mkdir(parents=True, exist_ok=True)  # Ensure the log folder exists
@@ -42,127 +92,412 @@ def setup_logging(log_folder, log_file_name):
 
     logging.info("Logging system initialized")
 
+def _find_chunk_headers(mm):
+    """Yield (line_start, match) for chunk header lines; match is None if the header is malformed"""
+    pos = mm.find(_CHUNK_MARKER)
+    while pos != -1:
+        line_start = mm.rfind(b'\n', 0, pos) + 1
+        # Only a marker at the start of its line (after indentation) begins a header
+        if not mm[line_start:pos].strip() and _CHUNK_START_RE.match(mm, line_start):
+            yield line_start, _CHUNK_RE.match(mm, line_start)
+        # Continue on the next line so a line is never matched twice
+        line_end = mm.find(b'\n', pos)
+        if line_end == -1:
+            break
+        pos = mm.find(_CHUNK_MARKER, line_end)
+
 def parse_chunks(log_file_path):
     """Parse the log file and extract chunk information"""
     chunks = []
-    current_chunk = None
-    
-    with open(log_file_path, 'r') as f:
-        for line in f:
-            # Check for chunk header
-            chunk_match = re.match(r'^Chunk #(\d+) \((\d+) files, ([\d.]+)MB\):', line.strip())
-            if chunk_match:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = {
-                    'number': int(chunk_match.group(1)),
-                    'file_count': int(chunk_match.group(2)),
-                    'size_mb': float(chunk_match.group(3)),
-                    'files': []
-                }
-            elif current_chunk and line.strip().startswith('- '):
-                # Extract file path from line
-                file_path = line.strip().split(' ')[1]
-                current_chunk['files'].append(file_path)
-        
-        # Add the last chunk if exists
-        if current_chunk:
-            chunks.append(current_chunk)
-    
+
+    with open(log_file_path, 'rb') as f:
+        # mmap refuses empty files
+        if os.fstat(f.fileno()).st_size == 0:
+            return chunks
+        # Scan the mapped bytes directly: no line splitting or decoding except for matched paths
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            headers = list(_find_chunk_headers(mm))
+            for index, (line_start, header) in enumerate(headers):
+                # File lines of a chunk run until the next chunk header
+                end = headers[index + 1][0] if index + 1 < len(headers) else len(mm)
+                if header is None:
+                    # Don't let the files of an unreadable header fall into the previous chunk
+                    line_end = mm.find(b'\n', line_start, end)
+                    line = mm[line_start:line_end if line_end != -1 else end]
+                    dropped = len(_FILE_RE.findall(mm, line_start, end))
+                    logging.warning(f"Malformed chunk header, skipping it and its {dropped} files: "
+                                    f"{line.decode('utf-8', 'replace').strip()}")
+                    continue
+                chunks.append({
+                    'number': int(header.group(1)),
+                    'file_count': int(header.group(2)),
+                    'size_mb': float(header.group(3)),
+                    'files': [path.decode('utf-8', 'replace')
+                              for path in _FILE_RE.findall(mm, header.end(), end)]
+                })
+
     return chunks
 
-def git_add_files(files, repo_path):
-    """Git add all files in the list"""
+def run_git(args, repo_path, input=None, capture=True):
+    """Run a git command in the repository and log its captured output once"""
+    # git -C changes directory inside git itself; the parent process CWD is never touched
+    cmd = ['git', '-C', repo_path] + args
+    if not capture:
+        # Output goes straight to the terminal so long commands keep showing progress
+        result = subprocess.run(cmd, input=input)
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd)
+        return result
+
+    result = subprocess.run(cmd, input=input,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = result.stdout.decode('utf-8', errors='replace').strip()
+    if output:
+        logging.log(logging.INFO if result.returncode == 0 else logging.ERROR, output)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd, output=result.stdout)
+    return result
+
+def _files_exist(paths):
+    """Return an existence flag for each path"""
+    return [os.access(path, os.F_OK) for path in paths]
+
+def _files_exist_uring(paths):
+    """Return an existence flag for each path using batched io_uring statx calls"""
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(URING_BATCH_SIZE, ring)
+    mask = [False] * len(paths)
     try:
-        # Change to repo directory
-        os.chdir(repo_path)
-        
-        for file in files:
-            # Check if file exists before adding
-            if os.path.exists(file):
-                subprocess.run(['git', 'add', file], check=True)
-                logging.info(f"Added to staging: {file}")
-            else:
-                logging.warning(f"File not found, skipping: {file}")
-        return True
+        for start in range(0, len(paths), URING_BATCH_SIZE):
+            batch = paths[start:start + URING_BATCH_SIZE]
+            # Statx buffers must stay alive until their completions are reaped
+            buffers = []
+            for index, path in enumerate(batch, start):
+                buffers.append(liburing.Statx())
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_statx(sqe, buffers[-1], path)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+            liburing.io_uring_submit_and_wait(ring, len(batch))
+            for _ in batch:
+                liburing.io_uring_wait_cqe(ring, cqe)
+                entry = cqe[0]
+                try:
+                    _ = entry.res  # raises the errno of a failed statx
+                    mask[entry.user_data] = True
+                except OSError:
+                    pass
+                liburing.io_uring_cqe_seen(ring, entry)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+    return mask
+
+def _check_access(files, repo_path):
+    """Return the files that exist, checked via io_uring or the shared thread pool for long lists"""
+    paths = [os.path.join(repo_path, f) for f in files]
+    mask = None
+    if len(paths) < EXISTS_CHECK_PARALLEL_MIN:
+        mask = _files_exist(paths)
+    elif liburing is not None and sys.platform.startswith('linux'):
+        try:
+            mask = _files_exist_uring(paths)
+        except OSError:
+            # io_uring unavailable (old kernel, disabled by sysctl or seccomp)
+            pass
+    if mask is None:
+        # One batch per worker so the pool overhead is paid per batch, not per file
+        step = -(-len(paths) // EXISTS_CHECK_WORKERS)
+        batches = [paths[i:i + step] for i in range(0, len(paths), step)]
+        mask = [flag for flags in _exists_pool.map(_files_exist, batches) for flag in flags]
+    return [f for f, exists in zip(files, mask) if exists]
+
+def find_existing_files(files, repo_path):
+    """Return the files from the list that exist in the repository"""
+    by_dir = {}
+    for f in files:
+        by_dir.setdefault(os.path.dirname(f), []).append(f)
+
+    # Directories holding several chunk files are read once with scandir;
+    # files alone in their directory are checked individually
+    existing = set()
+    unresolved = []
+    for directory, names in by_dir.items():
+        if len(names) == 1:
+            unresolved.extend(names)
+            continue
+        wanted = {}
+        for f in names:
+            wanted.setdefault(os.path.basename(f), []).append(f)
+        # Stop reading huge directories early; whatever is still unmatched falls back to os.access
+        scan_limit = len(names) * LISTDIR_ENTRIES_PER_FILE
+        try:
+            with os.scandir(os.path.join(repo_path, directory)) as entries:
+                for count, entry in enumerate(entries, 1):
+                    # Symlinks may dangle, so they are left to os.access
+                    if entry.name in wanted and not entry.is_symlink():
+                        existing.update(wanted.pop(entry.name))
+                    if not wanted or count >= scan_limit:
+                        break
+        except OSError:
+            continue
+        # Names not seen may still exist under a different case on Windows/macOS
+        for remaining in wanted.values():
+            unresolved.extend(remaining)
+
+    existing.update(_check_access(unresolved, repo_path))
+    return [f for f in files if f in existing]
+
+def prepare_chunk_files(files, repo_path):
+    """Dedupe, sort and existence-check a chunk's files, and pre-write their blobs"""
+    # Drop duplicates and sort so git receives paths in index order and
+    # siblings in the same directory are looked up together
+    files = sorted(set(files))
+    present = find_existing_files(files, repo_path)
+    git_hash_objects(present, repo_path)
+    return files, present
+
+def git_add_files(files, present, repo_path):
+    """Git add the present files with one git invocation; return the count added, or None on failure"""
+    try:
+        if present:
+            # Feed NUL-separated paths through stdin so large chunks never hit
+            # the command-line length limit (ARG_MAX / 32 KiB on Windows)
+            run_git(['add', '--pathspec-from-file=-', '--pathspec-file-nul'], repo_path,
+                    input='\0'.join(present).encode('utf-8'))
+
+        if len(present) != len(files):
+            present_set = set(present)
+            for file in files:
+                if file not in present_set:
+                    logging.warning(f"File not found, skipping: {file}")
+        return len(present)
     except subprocess.CalledProcessError as e:
         logging.error(f"Failed to add files to git: {e}")
-        return False
+        return None
     except Exception as e:
         logging.error(f"Error during git add: {e}")
-        return False
+        return None
+
+def git_hash_objects(present, repo_path):
+    """Write blobs for existing files into the object store without touching the index"""
+    # Best effort: git add finds the blobs already stored and skips compressing them.
+    # --stdin-paths is newline separated, so leave odd paths to git add.
+    present = [f for f in present if '\n' not in f]
+    if present:
+        try:
+            subprocess.run(['git', '-C', repo_path, 'hash-object', '-w', '--stdin-paths'],
+                           input='\n'.join(present).encode('utf-8'),
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError:
+            pass
 
-def git_commit_chunk(chunk_number, file_count):
+def git_commit_chunk(chunk_number, file_count, repo_path):
     """Create a git commit for the chunk"""
     try:
-        commit_message = f"Chunk #{chunk_number} - {file_count} files pushed successfully"
-        subprocess.run(['git', 'commit', '-m', commit_message], check=True)
+        commit_message = f"Chunk #{chunk_number} - {file_count} files"
+        # --quiet drops the per-file "create mode" summary on large chunks
+        run_git(['commit', '--quiet', '-m', commit_message], repo_path)
         logging.info(f"Committed chunk #{chunk_number} with message: '{commit_message}'")
         return True
     except subprocess.CalledProcessError as e:
         logging.error(f"Failed to commit chunk #{chunk_number}: {e}")
         return False
 
-def git_push():
+def git_push(repo_path):
     """Push changes to remote"""
     try:
-        subprocess.run(['git', 'push'], check=True)
+        # Not captured: a large push can take minutes and git reports its progress on stderr
+        run_git(['push'], repo_path, capture=False)
         logging.info("Pushed changes to remote repository")
         return True
     except subprocess.CalledProcessError as e:
         logging.error(f"Failed to push changes: {e}")
         return False
 
+def git_is_ahead(repo_path):
+    """Return True if the current branch has commits its upstream does not"""
+    result = subprocess.run(['git', '-C', repo_path, 'rev-list', '--count', '@{upstream}..HEAD'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    # No upstream configured: nothing to compare against
+    if result.returncode != 0:
+        return False
+    return int(result.stdout.strip() or 0) > 0
+
+def git_has_staged_changes(repo_path):
+    """Return True if the index differs from HEAD, i.e. there is something to commit"""
+    # Exit code 1 means differences; anything else (e.g. no HEAD yet) is left to git commit
+    result = subprocess.run(['git', '-C', repo_path, 'diff', '--cached', '--quiet'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode != 0
+
+def _journal_path(processed_chunks_file):
+    """Path of the append-only journal kept next to the processed chunks JSON file"""
+    return os.path.splitext(processed_chunks_file)[0] + '.ndjson'
+
 def load_processed_chunks(processed_chunks_file):
-    """Load the list of already processed chunk numbers from a JSON file"""
+    """Load the set of already processed chunk numbers from the JSON file and its journal"""
+    global _processed_cache
+    processed_chunks = set()
     if os.path.exists(processed_chunks_file):
-        with open(processed_chunks_file, 'r') as f:
-            return set(json.load(f))
-    return set()
+        with open(processed_chunks_file, 'rb') as f:
+            data = f.read()
+        processed_chunks.update(orjson.loads(data) if orjson else json.loads(data))
+
+    journal = _journal_path(processed_chunks_file)
+    if os.path.exists(journal):
+        with open(journal, 'r') as f:
+            for line in f:
+                # A line without its newline is a torn write from a crash
+                if line.endswith('\n') and line.strip().isdigit():
+                    processed_chunks.add(int(line))
+
+    if _processed_cache is None:
+        atexit.register(compact_processed_chunks, processed_chunks_file)
+    _processed_cache = processed_chunks
+    # Start this run with an empty journal
+    compact_processed_chunks(processed_chunks_file)
+    return set(processed_chunks)
 
 def save_processed_chunk(processed_chunks_file, chunk_number):
-    """Save the processed chunk number to a JSON file"""
-    processed_chunks = load_processed_chunks(processed_chunks_file)
-    processed_chunks.add(chunk_number)
-    with open(processed_chunks_file, 'w') as f:
-        json.dump(list(processed_chunks), f)
+    """Record a processed chunk number by appending it to the journal"""
+    global _journal_handle
+    if _processed_cache is None:
+        load_processed_chunks(processed_chunks_file)
+    _processed_cache.add(chunk_number)
+    if _journal_handle is None:
+        _journal_handle = open(_journal_path(processed_chunks_file), 'a', buffering=1)
+    _journal_handle.write(f"{chunk_number}\n")
+    _journal_handle.flush()
+    os.fsync(_journal_handle.fileno())
+
+def _fsync_directory(path):
+    """Flush the directory entry of a renamed file to disk where the platform allows it"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        # Windows cannot open directories; NTFS journals the rename itself
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def compact_processed_chunks(processed_chunks_file):
+    """Fold the journal into the processed chunks JSON file and remove it"""
+    global _journal_handle
+    if _journal_handle is not None:
+        _journal_handle.close()
+        _journal_handle = None
+    journal = _journal_path(processed_chunks_file)
+    if _processed_cache is None or not os.path.exists(journal):
+        return
+    processed_chunks = sorted(_processed_cache)
+    data = orjson.dumps(processed_chunks) if orjson else json.dumps(processed_chunks).encode('utf-8')
+    # The JSON must be durable before the journal is dropped, or a power loss
+    # could leave an empty file and no journal to rebuild it from
+    tmp = processed_chunks_file + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, processed_chunks_file)
+    _fsync_directory(processed_chunks_file)
+    os.remove(journal)
 
-def process_chunks(chunks, repo_path, processed_chunks_file):
+def push_remaining(repo_path, unpushed):
+    """Push commits that are still local, including ones left behind by an earlier run"""
+    # Chunks are marked processed once committed, so an interrupted run or a failed
+    # push leaves commits that only this check finds
+    if unpushed or git_is_ahead(repo_path):
+        if not git_push(repo_path):
+            logging.error("Final push failed, committed chunks are only local. "
+                          "Run 'git push' in the repository or run this tool again to publish them.")
+
+def process_chunks(chunks, repo_path, processed_chunks_file, push_every=PUSH_EVERY_N_CHUNKS):
     """Process all chunks and perform git operations"""
     total_chunks = len(chunks)
     processed_chunks = load_processed_chunks(processed_chunks_file)
     logging.info(f"Starting to process {total_chunks} chunks...")
+    unpushed = 0
 
+    # Existence checks and blob writes for upcoming chunks run on a pool while
+    # the main thread adds and commits; only the index needs one writer at a time
+    pending = []
     for chunk in chunks:
-        chunk_num = chunk['number']
-        if chunk_num in processed_chunks:
-            logging.info(f"Chunk #{chunk_num} has already been processed, skipping.")
-            continue
+        if chunk['number'] in processed_chunks:
+            logging.info(f"Chunk #{chunk['number']} has already been processed, skipping.")
+        else:
+            pending.append(chunk)
+    # Only a window of PREP_WORKERS chunks is prepared ahead, so an interrupted run
+    # leaves few unreferenced blobs and the pre-writes don't swamp git add's disk reads.
+    # Futures are matched to chunks by position: a log may repeat a chunk number.
+    prep_pool = ThreadPoolExecutor(max_workers=PREP_WORKERS)
+    prepared = deque(prep_pool.submit(prepare_chunk_files, chunk['files'], repo_path)
+                     for chunk in pending[:PREP_WORKERS])
 
-        file_count = chunk['file_count']
-        files = chunk['files']
+    try:
+        for index, chunk in enumerate(pending):
+            future = prepared.popleft()
+            if index + PREP_WORKERS < len(pending):
+                upcoming = pending[index + PREP_WORKERS]
+                prepared.append(prep_pool.submit(prepare_chunk_files, upcoming['files'], repo_path))
+            chunk_num = chunk['number']
+            file_count = chunk['file_count']
         
-        logging.info(f"\nProcessing Chunk #{chunk_num} ({file_count} files, {chunk['size_mb']}MB)")
+            logging.info(f"\nProcessing Chunk #{chunk_num} ({file_count} files, {chunk['size_mb']}MB)")
 
-        # Git add files
-        if not git_add_files(files, repo_path):
-            logging.error(f"Skipping Chunk #{chunk_num} due to git add failure")
-            continue
-        
-        # Git commit
-        if not git_commit_chunk(chunk_num, file_count):
-            logging.error(f"Skipping Chunk #{chunk_num} due to commit failure")
-            continue
+            # Git add files once their existence check and blobs are ready
+            try:
+                files, present = future.result()
+            except Exception as e:
+                logging.error(f"Error while checking files of chunk #{chunk_num}: {e}")
+                added = None
+            else:
+                added = git_add_files(files, present, repo_path)
+            if added is None:
+                logging.error(f"Skipping Chunk #{chunk_num} due to git add failure")
+                continue
+
+            # Nothing staged means git commit could only fail, so don't run it. Files can
+            # exist yet stage nothing when they are already committed (e.g. a rerun).
+            if added == 0:
+                logging.info(f"Chunk #{chunk_num} has no files to add, skipping commit")
+                save_processed_chunk(processed_chunks_file, chunk_num)
+                continue
+            if not git_has_staged_changes(repo_path):
+                logging.info(f"Chunk #{chunk_num} has no changes to commit, skipping commit")
+                save_processed_chunk(processed_chunks_file, chunk_num)
+                continue
+            # One summary line per chunk rather than one log record per file
+            logging.info(f"Added {added} files to staging (chunk #{chunk_num})")
         
-        # Git push (optional: could push after each chunk or at the end)
-        if not git_push():
-            logging.error(f"Push failed after Chunk #{chunk_num}")
-            # Continue with next chunk even if push fails
-            continue
+            # Git commit
+            if not git_commit_chunk(chunk_num, file_count, repo_path):
+                logging.error(f"Skipping Chunk #{chunk_num} due to commit failure")
+                continue
         
-        save_processed_chunk(processed_chunks_file, chunk_num)
-        logging.info(f"Successfully processed Chunk #{chunk_num}")
-    
+            save_processed_chunk(processed_chunks_file, chunk_num)
+            logging.info(f"Successfully processed Chunk #{chunk_num}")
+            unpushed += 1
+
+            # Git push is batched: every push_every chunks, otherwise once at the end
+            if push_every and unpushed >= push_every:
+                if git_push(repo_path):
+                    unpushed = 0
+                else:
+                    # Keep going; the commits are retried by the next push
+                    logging.error(f"Push failed after Chunk #{chunk_num}")
+    except Exception:
+        # Commits made before the error are already marked processed, so publish them.
+        # Ctrl-C is not caught: the user asked to stop, and the next run pushes instead.
+        push_remaining(repo_path, unpushed)
+        raise
+    finally:
+        prep_pool.shutdown(wait=False, cancel_futures=True)
+
+    push_remaining(repo_path, unpushed)
     logging.info("\nAll chunks processed!")
 
 def main():
@@ -173,10 +508,19 @@ def main():
     # Get input from user
     log_file = input("Enter the path to the .log file: ").strip()
     repo_path = input("Enter the path to the Git repository: ").strip()
+    push_every = input(f"Push after every N chunks (0 = once at the end) [{PUSH_EVERY_N_CHUNKS}]: ").strip()
     processed_chunks_file = "processed_chunks.json"
     
     print(f"Log file path: {log_file}")
     print(f"Repository path: {repo_path}")
+
+    if not push_every:
+        push_every = PUSH_EVERY_N_CHUNKS
+    elif push_every.isdigit():
+        push_every = int(push_every)
+    else:
+        logging.error("Push interval must be a whole number!")
+        return
     
     # Validate paths
     if not os.path.isfile(log_file):
@@ -203,7 +547,7 @@ def main():
         logging.info(f"Found {len(chunks)} chunks to process")
         
         # Process chunks
-        process_chunks(chunks, repo_path, processed_chunks_file)
+        process_chunks(chunks, repo_path, processed_chunks_file, push_every)
         
     except Exception as e:
         logging.error(f"An error occurred: {e}")